@@ -1,14 +1,18 @@
 """
 Setup script for py2app to create a standalone macOS application.
 """
+import os
 from setuptools import setup
 
 APP = ['gui_app.py']
 DATA_FILES = []
 ICON = 'thumbnail.icns'
+# Pose landmarker model (GPU inference), bundled when it has been downloaded.
+# posture_monitor.py finds the bundled copy via RESOURCEPATH.
+POSE_MODEL = 'resources/pose_landmarker_lite.task'
 
 OPTIONS = {
-    'argv_emulation': True,
+    'argv_emulation': False,  # AppleScript argv emulation slows (and can hang) startup
     'iconfile': ICON,  # App icon (.icns format)
     'plist': {
         'CFBundleName': 'Posture Corrector',
@@ -25,13 +29,19 @@ OPTIONS = {
         'NSMicrophoneUsageDescription': 'Not used, but required for some camera APIs.',
     },
     'packages': [
-        'PySide6',
         'cv2',
-        'mediapipe',
+        'mediapipe',  # Needs its bundled graph/model data files
         'numpy',
+        'numba',  # Compiles posture_math; needs its data files and llvmlite's library
+        'llvmlite',
     ],
     'includes': [
+        # Only the Qt modules the app uses, not all of PySide6
+        'PySide6.QtCore',
+        'PySide6.QtGui',
+        'PySide6.QtWidgets',
         'posture_monitor',
+        'posture_math',
         'warning_popup',
         'camera_preview',
         'cv2',
@@ -42,7 +52,14 @@ OPTIONS = {
         'tkinter',
         'matplotlib',
         'pandas',
+        'PySide6.QtWebEngineCore',
+        'PySide6.QtWebEngineWidgets',
+        'PySide6.QtQml',
+        'PySide6.QtQuick',
+        'PySide6.QtMultimedia',
+        'PySide6.Qt3DCore',
     ],
+    'resources': [POSE_MODEL] if os.path.exists(POSE_MODEL) else [],
 }
 
 setup(
@@ -3,19 +3,105 @@ Camera preview window with pose detection overlay.
 Small popup window that appears when clicking the menu bar icon.
 """
 import cv2
+import math
 import numpy as np
 import sys
 import os
 import platform
+import queue
+import threading
+import time
+from PySide6.QtWidgets import QApplication, QLabel
+from PySide6.QtGui import QImage, QPixmap, QKeySequence, QShortcut
+from PySide6.QtCore import Qt, QTimer, QEventLoop, Signal
+
+try:
+    from .posture_monitor import _create_pose_landmarker
+except ImportError:
+    # Run as a script (python src/camera_preview.py)
+    from posture_monitor import _create_pose_landmarker
+
+# Make sure OpenCV's SIMD/IPP paths are on for resize/cvtColor/drawing
+cv2.setUseOptimized(True)
+
+# Frame-diff gate: skip pose inference while the 40x30 grayscale thumbnail's
+# sum of absolute differences from the last inferred frame stays below
+# MOTION_THRESHOLD, but re-run it at least every MOTION_REFRESH_FRAMES frames
+MOTION_THRESHOLD = 2000
+MOTION_REFRESH_FRAMES = 15
+
+# Ratio smoothing: the status uses the mean of the last RATIO_WINDOW ratios,
+# and leaving SLOUCHING requires recovering STATUS_HYSTERESIS past the
+# threshold so the status doesn't flicker near the boundary. The ratio
+# readout is refreshed every RATIO_TEXT_REFRESH frames.
+RATIO_WINDOW = 16
+STATUS_HYSTERESIS = 0.03
+RATIO_TEXT_REFRESH = 10
+
+# Overlay text geometry is constant, so measure it once instead of every frame
+STATUS_FONT = cv2.FONT_HERSHEY_DUPLEX
+_STATUS_TEXT_SIZES = {
+    status: cv2.getTextSize(status, STATUS_FONT, 0.5, 1)[0]
+    for status in ("SLOUCHING", "GOOD POSTURE")
+}
+# Sized for the widest expected "current / baseline" text
+_RATIO_TEXT_SIZE = cv2.getTextSize("00.00 / 00.00", STATUS_FONT, 0.35, 1)[0]
+
+
+def _put_latest(q, item):
+    """Put item on a bounded queue, discarding the oldest entry when full"""
+    while True:
+        try:
+            q.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+
+
+class _PreviewLabel(QLabel):
+    """Preview window that reports when it is closed"""
+    closed = Signal()
+    
+    def closeEvent(self, event):
+        self.closed.emit()
+        super().closeEvent(event)
+
+
+def _to_preview_size(frame, width, height):
+    """Scale a frame to the preview size, skipping work when possible"""
+    frame_height, frame_width = frame.shape[:2]
+    if frame_width == width and frame_height == height:
+        return frame
+    if frame_width == 2 * width and frame_height == 2 * height:
+        # Exact 2x (e.g. 640x480): taking every other pixel is a plain strided copy
+        return np.ascontiguousarray(frame[::2, ::2])
+    return cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
 
 
 def show_camera_preview(baseline_ratio=None):
     """
     Show camera preview with pose detection overlay in a small popup window.
     
+    Uses the BlazePose Lite model (model_complexity=0), which is roughly 2-3x
+    faster on CPU than the default Full model. Landmarks are slightly less
+    accurate, which is fine for the nose/shoulder ratio shown here.
+    
+    The window is a PySide6 widget driven by a local Qt event loop, so it can
+    be opened from an already-running Qt app without blocking its UI.
+    
     Args:
         baseline_ratio: If provided, shows slouch detection. Otherwise just shows pose.
     """
+    # Set window to small popup size (like a menu bar dropdown)
+    window_width = 320
+    window_height = 240
+    
+    # Set when the window closes or the camera stops, to end the workers
+    stop_event = threading.Event()
+    
     # Import MediaPipe (delay import to avoid issues when bundled)
     try:
         import mediapipe as mp
@@ -23,100 +109,197 @@ def show_camera_preview(baseline_ratio=None):
         print("Error: MediaPipe not available")
         return
     mp_pose = mp.solutions.pose
-    pose = mp_pose.Pose(
-        static_image_mode=False,
-        min_detection_confidence=0.5,
-        min_tracking_confidence=0.5
-    )
-    mp_drawing = mp.solutions.drawing_utils
     
-    cap = cv2.VideoCapture(0)
+    # Prefer the Tasks API (GPU delegate), fall back to the CPU-only solution
+    pose = None
+    # A missed detection only hides the overlay, so accept less confident poses
+    landmarker = _create_pose_landmarker(mp, min_detection_confidence=0.3)
+    if landmarker is None:
+        pose = mp_pose.Pose(
+            static_image_mode=False,
+            model_complexity=0,  # Lite model - nose and shoulders don't need the full network
+            enable_segmentation=False,  # No segmentation mask needed
+            smooth_landmarks=True,
+            min_detection_confidence=0.3,  # A missed detection only hides the overlay
+            min_tracking_confidence=0.5
+        )
+    
+    # AVFoundation honors the buffer/size hints below on macOS
+    if platform.system() == 'Darwin':
+        cap = cv2.VideoCapture(0, cv2.CAP_AVFOUNDATION)
+    else:
+        cap = cv2.VideoCapture(0)
     
     if not cap.isOpened():
         print("Error: Could not open camera")
+        # Release the model loaded above before giving up
+        try:
+            if landmarker is not None:
+                landmarker.close()
+            elif pose is not None:
+                pose.close()
+        except:
+            pass
         return
     
-    # Set window to small popup size (like a menu bar dropdown)
-    window_width = 320
-    window_height = 240
+    # Keep only the freshest frame in the driver buffer and ask for the
+    # preview size directly so frames don't need resizing
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, window_width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, window_height)
+    
+    # Create window (reuse the running Qt app when embedded)
+    app = QApplication.instance() or QApplication(sys.argv)
+    window = _PreviewLabel()
+    window.setWindowTitle('Posture Preview')
+    window.setFixedSize(window_width, window_height)
     
-    # Create window
-    cv2.namedWindow('Posture Preview', cv2.WINDOW_NORMAL)
-    cv2.resizeWindow('Posture Preview', window_width, window_height)
+    # Set window to stay on top
+    window.setWindowFlag(Qt.WindowStaysOnTopHint)
     
     # Position window near top-right (where menu bar is)
-    # Get screen dimensions for better positioning
     if platform.system() == 'Darwin':  # macOS
-        try:
-            # Try to get screen width using system_profiler or defaults
-            import subprocess
-            result = subprocess.run(['system_profiler', 'SPDisplaysDataType'], 
-                                  capture_output=True, text=True)
-            # For simplicity, position at a reasonable offset from right edge
-            # Most Mac screens are at least 1440px wide, so position at right edge minus window width
-            screen_width = 1920  # Default, will be adjusted
-            x_position = screen_width - window_width - 20  # 20px margin from right edge
-            cv2.moveWindow('Posture Preview', x_position, 30)  # 30px from top (below menu bar)
-        except:
-            # Fallback: position at fixed location
-            cv2.moveWindow('Posture Preview', 1600, 30)
+        screen_width = app.primaryScreen().availableGeometry().width()
+        x_position = screen_width - window_width - 20  # 20px margin from right edge
+        window.move(x_position, 30)  # 30px from top (below menu bar)
     
-    # Set window to stay on top (if possible)
-    cv2.setWindowProperty('Posture Preview', cv2.WND_PROP_TOPMOST, 1)
+    QShortcut(QKeySequence('Q'), window, activated=window.close)
     
     print("Camera preview opened. Press 'Q' to close.")
+    print(f"OpenCV optimized code paths: {'on' if cv2.useOptimized() else 'off'}")
     
     SENSITIVITY = 0.85
     
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        # Resize frame to small preview size
-        frame = cv2.resize(frame, (window_width, window_height))
+    cap_q = queue.Queue(maxsize=2)   # capture -> pose
+    draw_q = queue.Queue(maxsize=2)  # pose -> display
+    
+    def capture_worker():
+        """Read frames from the camera and hand them to the pose worker"""
+        while not stop_event.is_set() and cap.isOpened():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            
+            # Resize frame to small preview size (only if the driver ignored the size hint)
+            frame = _to_preview_size(frame, window_width, window_height)
+            
+            _put_latest(cap_q, frame)
+        stop_event.set()
+    
+    def pose_worker():
+        """Run pose detection on the newest captured frame"""
+        prev_small = None  # Thumbnail of the last frame that went through inference
+        landmarks = None
+        skipped = 0
+        
+        while not stop_event.is_set():
+            try:
+                frame = cap_q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            
+            # Reuse the previous landmarks when the scene hasn't changed
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            small = cv2.resize(gray, (40, 30), interpolation=cv2.INTER_AREA).astype(np.int16)
+            if prev_small is not None and skipped < MOTION_REFRESH_FRAMES:
+                diff = int(np.abs(small - prev_small).sum())
+                if diff < MOTION_THRESHOLD:
+                    skipped += 1
+                    _put_latest(draw_q, (frame, landmarks))
+                    continue
+            prev_small = small
+            skipped = 0
+            
+            # MediaPipe needs RGB; keep the BGR frame for drawing and display.
+            # A read-only buffer lets MediaPipe skip its internal copy.
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            rgb.flags.writeable = False
+            
+            if landmarker is not None:
+                mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
+                result = landmarker.detect_for_video(mp_image, int(time.monotonic() * 1000))
+                landmarks = result.pose_landmarks[0] if result.pose_landmarks else None
+            else:
+                pose_landmarks = pose.process(rgb).pose_landmarks
+                landmarks = pose_landmarks.landmark if pose_landmarks else None
+            
+            _put_latest(draw_q, (frame, landmarks))
+    
+    def queued_frame():
+        """Newest (frame, landmarks) from the pose worker, or None"""
+        try:
+            return draw_q.get_nowait()
+        except queue.Empty:
+            return None
+    
+    workers = [
+        threading.Thread(target=capture_worker, daemon=True),
+        threading.Thread(target=pose_worker, daemon=True),
+    ]
+    for worker in workers:
+        worker.start()
+    
+    # Ring buffer of recent ratios for smoothing
+    ratio_buf = np.zeros(RATIO_WINDOW, dtype=np.float32)
+    ratio_count = 0
+    last_status = None
+    ratio_text = ""
+    
+    # Nose, left shoulder, right shoulder in pixels (reused every frame)
+    pts = np.empty((3, 2), dtype=np.float32)
+    
+    def render_frame():
+        """Draw the overlay on the newest frame and show it (runs on the Qt thread)"""
+        nonlocal ratio_count, last_status, ratio_text
+        if stop_event.is_set():
+            window.close()
+            return
+        item = queued_frame()
+        if item is None:
+            return
+        image, lm = item
         
-        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = pose.process(image)
-
-        image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
         h, w, _ = image.shape
 
-        if results.pose_landmarks:
-            lm = results.pose_landmarks.landmark
-
-            nose = [lm[0].x * w, lm[0].y * h]
-            l_shldr = [lm[11].x * w, lm[11].y * h]
-            r_shldr = [lm[12].x * w, lm[12].y * h]
+        if lm:
+            lm0, l11, l12 = lm[0], lm[11], lm[12]
+            pts[0] = lm0.x, lm0.y
+            pts[1] = l11.x, l11.y
+            pts[2] = l12.x, l12.y
+            pts *= (w, h)
+            (nose_x, nose_y), (lx, ly), (rx, ry) = pts.tolist()
+            nose, l_shldr, r_shldr = map(tuple, pts.astype(np.int32).tolist())
 
-            shldr_mid_x = (l_shldr[0] + r_shldr[0]) / 2
-            shldr_mid_y = (l_shldr[1] + r_shldr[1]) / 2
+            shldr_mid_y = (ly + ry) * 0.5
 
             # Vertical distance (Neck Height)
-            neck_height = abs(shldr_mid_y - nose[1])
+            neck_height = abs(shldr_mid_y - nose_y)
             
             # Horizontal distance (Shoulder Width)
-            shldr_width = np.linalg.norm(np.array(l_shldr) - np.array(r_shldr))
+            shldr_width = math.hypot(lx - rx, ly - ry)
 
             if shldr_width > 0:
                 current_ratio = neck_height / shldr_width
 
-                # Draw pose lines (thinner for small window)
-                cv2.line(image, (int(shldr_mid_x), int(shldr_mid_y)), 
-                        (int(nose[0]), int(nose[1])), (255, 255, 0), 1)
-                cv2.line(image, (int(l_shldr[0]), int(l_shldr[1])), 
-                        (int(r_shldr[0]), int(r_shldr[1])), (255, 0, 255), 1)
+                # Draw only the landmarks the posture check uses (thinner for small window)
+                shldr_mid = ((l_shldr[0] + r_shldr[0]) // 2, (l_shldr[1] + r_shldr[1]) // 2)
+                cv2.line(image, shldr_mid, nose, (255, 255, 0), 1)
+                cv2.line(image, l_shldr, r_shldr, (255, 0, 255), 1)
+                for point in (nose, l_shldr, r_shldr):
+                    cv2.circle(image, point, 2, (0, 255, 0), -1)
 
-                # Draw pose landmarks (smaller for compact view)
-                mp_drawing.draw_landmarks(
-                    image, results.pose_landmarks, mp_pose.POSE_CONNECTIONS,
-                    mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=1, circle_radius=2),
-                    mp_drawing.DrawingSpec(color=(255, 0, 0), thickness=1)
-                )
+                # Smooth the ratio over the last few frames
+                ratio_buf[ratio_count % RATIO_WINDOW] = current_ratio
+                ratio_count += 1
+                smoothed_ratio = float(ratio_buf[:min(ratio_count, RATIO_WINDOW)].mean())
+                refresh_text = ratio_count % RATIO_TEXT_REFRESH == 1
 
                 # Show status with professional font - always show if baseline exists
                 if baseline_ratio:
-                    if current_ratio < (baseline_ratio * SENSITIVITY):
+                    threshold = baseline_ratio * SENSITIVITY
+                    if last_status == "SLOUCHING":
+                        threshold += baseline_ratio * STATUS_HYSTERESIS
+                    if smoothed_ratio < threshold:
                         status = "SLOUCHING"
                         color = (0, 0, 255)  # Red
                         bg_color = (0, 0, 0)
@@ -126,14 +309,12 @@ def show_camera_preview(baseline_ratio=None):
                         bg_color = (0, 0, 0)
                     
                     # Use FONT_HERSHEY_DUPLEX for more professional look
-                    font = cv2.FONT_HERSHEY_DUPLEX
+                    font = STATUS_FONT
                     font_scale = 0.5
                     thickness = 1
                     
-                    # Get text size for background
-                    (text_width, text_height), baseline = cv2.getTextSize(
-                        status, font, font_scale, thickness
-                    )
+                    # Precomputed text size for background
+                    text_width, text_height = _STATUS_TEXT_SIZES[status]
                     
                     # Draw background rectangle for better readability
                     cv2.rectangle(image, (5, 5), (text_width + 10, text_height + 10), 
@@ -144,10 +325,10 @@ def show_camera_preview(baseline_ratio=None):
                                font, font_scale, color, thickness)
                     
                     # Show ratio in smaller font below
-                    ratio_text = f"{current_ratio:.2f} / {baseline_ratio:.2f}"
-                    (ratio_width, ratio_height), _ = cv2.getTextSize(
-                        ratio_text, font, 0.35, 1
-                    )
+                    if refresh_text or status != last_status:
+                        ratio_text = f"{smoothed_ratio:.2f} / {baseline_ratio:.2f}"
+                    last_status = status
+                    ratio_width, ratio_height = _RATIO_TEXT_SIZE
                     cv2.rectangle(image, (5, text_height + 15), 
                                  (ratio_width + 10, text_height + ratio_height + 15), 
                                  bg_color, -1)
@@ -155,8 +336,9 @@ def show_camera_preview(baseline_ratio=None):
                                font, 0.35, (255, 255, 255), 1)
                 else:
                     # No baseline - just show ratio
-                    font = cv2.FONT_HERSHEY_DUPLEX
-                    ratio_text = f"Ratio: {current_ratio:.2f}"
+                    font = STATUS_FONT
+                    if refresh_text:
+                        ratio_text = f"Ratio: {smoothed_ratio:.2f}"
                     cv2.putText(image, ratio_text, (10, 25), 
                                font, 0.5, (255, 255, 255), 1)
         
@@ -164,23 +346,41 @@ def show_camera_preview(baseline_ratio=None):
         cv2.putText(image, "Press Q to close", (5, h - 5), 
                    cv2.FONT_HERSHEY_DUPLEX, 0.3, (150, 150, 150), 1)
 
-        cv2.imshow('Posture Preview', image)
-
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+        qt_image = QImage(image.data, w, h, 3 * w, QImage.Format_BGR888)
+        window.setPixmap(QPixmap.fromImage(qt_image))
+    
+    # Drawing and display run on the Qt thread at ~30 Hz until the window closes
+    loop = QEventLoop()
+    window.closed.connect(loop.quit)
+    timer = QTimer()
+    timer.timeout.connect(render_frame)
+    timer.start(33)
+    window.show()
+    loop.exec()
+    timer.stop()
 
+    # Stop worker threads before releasing the camera they read from
+    stop_event.set()
+    for worker in workers:
+        worker.join(timeout=1)
+    
     # Cleanup: release camera properly
     try:
         cap.release()
     except:
         pass
     
-    # Close all windows
+    # Release the pose model
     try:
-        cv2.destroyAllWindows()
+        if landmarker is not None:
+            landmarker.close()
+        elif pose is not None:
+            pose.close()
     except:
         pass
     
+    window.deleteLater()
+    
     # Force garbage collection to ensure camera is released
     import gc
     gc.collect()
@@ -197,4 +397,7 @@ if __name__ == "__main__":
         except ValueError:
             pass
     
+    # Standalone process: keep OpenCV's pool small so it doesn't compete with
+    # MediaPipe's threads (the app sets its own count in gui_app.main)
+    cv2.setNumThreads(2)
     show_camera_preview(baseline)
@@ -3,6 +3,10 @@ Posture Corrector GUI Application using PySide6.
 Main window application with embedded camera preview.
 """
 import sys
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import cv2
 import numpy as np
 import subprocess
@@ -11,43 +15,56 @@ from PySide6.QtWidgets import (
     QPushButton, QLabel, QTextEdit, QGroupBox, QMessageBox
 )
 from PySide6.QtGui import QFont, QImage, QPixmap
-from PySide6.QtCore import Qt, QTimer, QThread, Signal
-from .posture_monitor import PostureMonitor
+from PySide6.QtCore import Qt, QTimer, QThread, QMutex, Signal
+from .posture_monitor import PostureMonitor, CAMERA_BACKEND, _import_posture_math
 from .warning_popup import WarningPopup
 
+# Pixel format of the frames CameraThread emits (OpenCV BGR)
+_QIMG_FMT = QImage.Format_BGR888
+
+# Overlay color for posture_math.classify() score codes (the status text/colors
+# are keyed once posture_math is loaded, see CameraThread.initialize_mediapipe)
+_SCORE_COLORS = (
+    (0, 255, 0),  # Green for good/excellent
+    (0, 165, 255),  # Orange for fair
+    (0, 0, 255),  # Red for poor
+)
+
+# Result of the last real camera open: None until the camera has been opened
+# once, then True/False. CameraThread and the monitor's status updates set it;
+# nothing opens the camera just to check (the macOS permission prompt fires on
+# the first real open).
+_perm_cached = None
+
 
 def check_camera_permission():
-    """Check if camera permission is granted on macOS"""
-    try:
-        # Try to open camera briefly to trigger permission dialog if needed
-        cap = cv2.VideoCapture(0)
-        if cap.isOpened():
-            ret, _ = cap.read()
-            cap.release()
-            return ret
-        else:
-            return False
-    except Exception:
-        return False
+    """Return False only if opening the camera has already failed"""
+    return _perm_cached is not False
 
 
-def request_camera_permission():
-    """Request camera permission and show instructions if denied"""
-    # Try to open camera - this will trigger macOS permission dialog
-    cap = cv2.VideoCapture(0)
-    if cap.isOpened():
-        # Permission granted or already had access
-        cap.release()
-        return True
-    else:
-        # Permission denied or camera unavailable
-        cap.release()
+def _record_camera_open(opened):
+    """
+    Record the result of a real camera open.
+    
+    Returns:
+        True if a failed open most likely means permission was denied (the
+        camera hasn't opened once this session)
+    """
+    global _perm_cached
+    if opened:
+        _perm_cached = True
+        return False
+    if _perm_cached is True:
         return False
+    _perm_cached = False
+    return True
 
 
 class CameraThread(QThread):
     """Thread for capturing and processing camera frames"""
-    frame_ready = Signal(np.ndarray)  # Signal emitted when a new frame is ready
+    frame_ready = Signal()  # Emitted when a new frame is ready (fetch it with get_latest)
+    camera_error = Signal()  # Emitted when the camera can't be opened or fails
+    permission_denied = Signal()  # Emitted when the camera has never opened successfully
     
     def __init__(self, baseline_ratio=None, monitor=None):
         super().__init__()
@@ -55,22 +72,151 @@ class CameraThread(QThread):
         self.monitor = monitor  # Reference to PostureMonitor to get status
         self.running = False
         self.cap = None
-        self.pose = None
+        self._owner = None  # PostureMonitor whose pose model is borrowed
         self.mp_pose = None
-        self.mp_drawing = None
+        self._pm = None  # posture_math, imported with the pose model
+        self._status_lut = {}
         self.SENSITIVITY = 0.85
+        
+        # Single-slot frame buffer: the GUI reads whichever frame is newest,
+        # so frames it didn't get to are simply replaced instead of queued.
+        # _published is the buffer index behind _latest and _in_use the one
+        # the GUI is still copying (both guarded by _mutex).
+        self._mutex = QMutex()
+        self._latest = None
+        self._published = None
+        self._in_use = None
+        self.MAX_DRAIN_GRABS = 5  # Upper bound on stale frames skipped per iteration
+        
+        # Pose detection runs at ~10 Hz; frames in between reuse the last landmarks
+        self.INFERENCE_INTERVAL = 0.1
+        # MediaPipe works on a downscaled copy (landmarks come back normalized,
+        # so they still map onto the full-size frame). Keeps the 4:3 aspect.
+        self.INFERENCE_SIZE = (256, 192)
+        
+        # Preallocated buffers so the capture path doesn't allocate per frame.
+        # With three, one is always free to decode into while one is published
+        # and another is still being copied by the GUI.
+        self._frames = [np.empty((480, 640, 3), np.uint8) for _ in range(3)]
+        small_w, small_h = self.INFERENCE_SIZE
+        self._small_bgr = np.empty((small_h, small_w, 3), np.uint8)
+        self._small_rgb = np.empty((small_h, small_w, 3), np.uint8)
+        
+        self._last_landmarks = None
+        self._last_inference_ts = 0.0
+        # Inference runs on a worker so capture never waits on MediaPipe;
+        # at most one frame is in flight, so the worker always gets a fresh one
+        self._exec = None
+        self._inflight = deque(maxlen=1)
+        
+        # Lines, landmarks and text are drawn into this persistent BGR buffer
+        # when new landmarks arrive and copied onto each frame through its mask
+        self._overlay = None
+        self._overlay_mask = None
+        self._overlay_roi = None  # Bounding box of the drawn pixels
+    
+    def _free_buffer(self):
+        """Index of a frame buffer that is neither published nor being copied by the GUI"""
+        self._mutex.lock()
+        busy = (self._published, self._in_use)
+        self._mutex.unlock()
+        return next(i for i in range(len(self._frames)) if i not in busy)
+    
+    def _grab_latest(self):
+        """
+        Grab frames until one comes from the live camera rather than the
+        driver buffer. A buffered frame is returned almost instantly, while a
+        live one makes grab() wait for the sensor. Only the last grabbed frame
+        needs to be decoded with retrieve().
+        """
+        for _ in range(self.MAX_DRAIN_GRABS):
+            start = time.monotonic()
+            if not self.cap.grab():
+                return False
+            if time.monotonic() - start > 0.005:
+                return True  # Waited for the camera, so this frame is fresh
+        return True
     
     def initialize_mediapipe(self):
-        """Initialize MediaPipe"""
+        """Borrow the monitor's pose model so it is loaded once per process"""
         if self.mp_pose is None:
-            import mediapipe as mp
-            self.mp_pose = mp.solutions.pose
-            self.pose = self.mp_pose.Pose(
-                static_image_mode=False,
-                min_detection_confidence=0.5,
-                min_tracking_confidence=0.5
-            )
-            self.mp_drawing = mp.solutions.drawing_utils
+            self._owner = self.monitor or PostureMonitor()
+            self._owner.load_model()
+            self.mp_pose = self._owner.mp_pose
+            
+            # Import and compile the posture classifier now rather than on the first frame
+            self._pm = _import_posture_math()
+            self._pm.classify(0.0, 0.0, 1.0, 1.0, 1.0, 1.0, self.SENSITIVITY)
+            # Overlay text/color for the classifier's status codes
+            self._status_lut = {
+                self._pm.STATUS_SLOUCHING: ("SLOUCHING", (0, 0, 255)),  # Red
+                self._pm.STATUS_GOOD: ("GOOD POSTURE", (0, 255, 0)),  # Green
+            }
+    
+    def _open_camera(self):
+        """Open the camera, retrying once in case the device is briefly busy"""
+        self.cap = None
+        for attempt in range(2):
+            if attempt:
+                self.msleep(500)  # Wait before retry
+            try:
+                self.cap = cv2.VideoCapture(0, CAMERA_BACKEND)
+                if self.cap.isOpened():
+                    # Set camera properties for better compatibility
+                    self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+                    self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+                    
+                    # Keep only the newest frame queued in the driver so we
+                    # never process stale frames (some backends ignore this)
+                    if not self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1):
+                        print("Camera backend ignored CAP_PROP_BUFFERSIZE=1")
+                    
+                    # Test if we can actually read a frame
+                    ret, test_frame = self.cap.read()
+                    if ret and test_frame is not None:
+                        break
+                    else:
+                        if self.cap:
+                            self.cap.release()
+                        self.cap = None
+                else:
+                    if self.cap:
+                        self.cap.release()
+                    self.cap = None
+            except Exception as e:
+                error_detail = f"Camera open attempt {attempt + 1} failed: {type(e).__name__}: {str(e)}"
+                print(error_detail)
+                traceback.print_exc()
+                if self.cap:
+                    try:
+                        self.cap.release()
+                    except:
+                        pass
+                    self.cap = None
+        
+        if not self.cap or not self.cap.isOpened():
+            error_msg = "Failed to open camera after 2 attempts.\n\n"
+            error_msg += "Possible causes:\n"
+            error_msg += "1. Camera permission denied\n"
+            error_msg += "2. Another app is using the camera\n"
+            error_msg += "3. Camera hardware issue\n"
+            error_msg += "4. Camera driver issue\n\n"
+            error_msg += "Please check System Settings > Privacy & Security > Camera"
+            print(error_msg)
+            if _record_camera_open(False):
+                # Never had the camera in this session - most likely permission
+                self.permission_denied.emit()
+            else:
+                self.camera_error.emit()
+            return False
+        
+        _record_camera_open(True)
+        print("Camera opened successfully, starting frame capture...")
+        return True
+    
+    def _monitor_active(self):
+        """True while the monitor's camera and pose results can be shown instead"""
+        return self.monitor is not None and self.monitor.running
     
     def run(self):
         """Main camera loop"""
@@ -78,174 +224,225 @@ class CameraThread(QThread):
             self.running = True
             self.initialize_mediapipe()
             
-            # Try to open camera with retry
+            # While monitoring runs, its camera and landmarks are shown instead
+            # of opening a second camera and inference stream
             self.cap = None
-            for attempt in range(5):  # More retries
-                try:
-                    self.cap = cv2.VideoCapture(0)
-                    if self.cap.isOpened():
-                        # Set camera properties for better compatibility
-                        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-                        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-                        
-                        # Test if we can actually read a frame
-                        ret, test_frame = self.cap.read()
-                        if ret and test_frame is not None:
-                            break
-                        else:
-                            if self.cap:
-                                self.cap.release()
-                            self.cap = None
-                    else:
-                        if self.cap:
-                            self.cap.release()
-                        self.cap = None
-                except Exception as e:
-                    error_detail = f"Camera open attempt {attempt + 1} failed: {type(e).__name__}: {str(e)}"
-                    print(error_detail)
-                    import traceback
-                    traceback.print_exc()
-                    if self.cap:
-                        try:
-                            self.cap.release()
-                        except:
-                            pass
-                        self.cap = None
-                
-                self.msleep(500)  # Wait before retry
-            
-            if not self.cap or not self.cap.isOpened():
-                error_msg = "Failed to open camera after 5 retries.\n\n"
-                error_msg += "Possible causes:\n"
-                error_msg += "1. Camera permission denied\n"
-                error_msg += "2. Another app is using the camera\n"
-                error_msg += "3. Camera hardware issue\n"
-                error_msg += "4. Camera driver issue\n\n"
-                error_msg += "Please check System Settings > Privacy & Security > Camera"
-                print(error_msg)
-                self.frame_ready.emit(None)
+            if not self._monitor_active() and not self._open_camera():
                 return
             
-            print("Camera opened successfully, starting frame capture...")
             frame_count = 0
+            monitor_frame = None  # Last monitor frame shown
+            self._last_landmarks = None
+            
+            # Bind OpenCV functions/constants used every frame to locals
+            cvt_color, bgr2rgb = cv2.cvtColor, cv2.COLOR_BGR2RGB
+            resize, inter_area = cv2.resize, cv2.INTER_AREA
+            draw_line, draw_circle, put_text = cv2.line, cv2.circle, cv2.putText
+            font = cv2.FONT_HERSHEY_DUPLEX
+            self._last_inference_ts = 0.0
+            self._exec = ThreadPoolExecutor(max_workers=1)
+            self._inflight.clear()
+            self._overlay = None
+            overlay_dirty = True
             
             while self.running:
                 try:
-                    ret, frame = self.cap.read()
-                    if not ret or frame is None:
-                        print(f"Failed to read frame (ret={ret}, frame is None={frame is None})")
-                        self.msleep(100)
-                        continue
+                    buf = self._free_buffer()
+                    use_monitor = self._monitor_active()
+                    if use_monitor:
+                        # Monitoring took over the camera - hand ours back
+                        if self.cap:
+                            self.cap.release()
+                            self.cap = None
+                        with self.monitor.frame_lock:
+                            shared, landmarks = self.monitor.latest_frame, self.monitor.latest_landmarks
+                        if shared is None or shared is monitor_frame:
+                            self.msleep(10)  # No new monitor frame yet
+                            continue
+                        monitor_frame = shared
+                        # Draw on our own copy, never on the monitor's frame
+                        if self._frames[buf].shape != shared.shape:
+                            self._frames[buf] = np.empty_like(shared)
+                        frame = self._frames[buf]
+                        np.copyto(frame, shared)
+                        if landmarks is not self._last_landmarks:
+                            self._last_landmarks = landmarks
+                            overlay_dirty = True
+                    else:
+                        # Monitoring stopped - open our own camera again
+                        if self.cap is None:
+                            monitor_frame = None
+                            if not self._open_camera():
+                                break
+                        
+                        # Skip stale buffered frames, then decode only the newest one
+                        # into the buffer that isn't currently published
+                        if self._grab_latest():
+                            ret, frame = self.cap.retrieve(self._frames[buf])
+                        else:
+                            ret, frame = False, None
+                        if not ret or frame is None:
+                            print(f"Failed to read frame (ret={ret}, frame is None={frame is None})")
+                            self.msleep(100)
+                            continue
+                        # OpenCV hands back a new array if the camera ignored 640x480
+                        self._frames[buf] = frame
                     
                     frame_count += 1
                     
-                    # Process frame with MediaPipe
-                    image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    results = self.pose.process(image_rgb)
+                    # Pick up a finished inference without waiting for it
+                    if not use_monitor and self._inflight and self._inflight[0].done():
+                        future = self._inflight.popleft()
+                        try:
+                            self._last_landmarks = future.result()
+                            overlay_dirty = True
+                        except Exception as e:
+                            print(f"Pose detection failed: {e}")
                     
-                    # Draw pose detection
-                    image_bgr = cv2.cvtColor(image_rgb, cv2.COLOR_RGB2BGR)
-                    h, w, _ = image_bgr.shape
+                    # Hand the next frame to MediaPipe once the previous one is
+                    # done (throttled so the preview frame rate doesn't depend
+                    # on inference time)
+                    now = time.monotonic()
+                    if (not use_monitor and not self._inflight
+                            and now - self._last_inference_ts >= self.INFERENCE_INTERVAL):
+                        # MediaPipe gets a small RGB copy; the BGR frame is what gets displayed
+                        # Color is kept on purpose: MediaPipe needs a contiguous
+                        # 3-channel buffer (a broadcast grayscale view would be
+                        # copied back to 3 channels anyway) and the model is
+                        # trained on color. At this size the conversion is cheap.
+                        # Nothing is in flight, so the RGB buffer is free to overwrite
+                        resize(frame, self.INFERENCE_SIZE, dst=self._small_bgr, interpolation=inter_area)
+                        image_rgb = self._small_rgb
+                        image_rgb.flags.writeable = True
+                        cvt_color(self._small_bgr, bgr2rgb, dst=image_rgb)
+                        image_rgb.flags.writeable = False  # Lets MediaPipe skip its internal copy
+                        self._inflight.append(self._exec.submit(self._owner.detect_landmarks, image_rgb))
+                        self._last_inference_ts = now
+                    pose_landmarks = self._last_landmarks
                     
-                    if results.pose_landmarks:
-                        lm = results.pose_landmarks.landmark
-                        
-                        nose = [lm[0].x * w, lm[0].y * h]
-                        l_shldr = [lm[11].x * w, lm[11].y * h]
-                        r_shldr = [lm[12].x * w, lm[12].y * h]
-                        
-                        shldr_mid_x = (l_shldr[0] + r_shldr[0]) / 2
-                        shldr_mid_y = (l_shldr[1] + r_shldr[1]) / 2
-                        
-                        neck_height = abs(shldr_mid_y - nose[1])
-                        shldr_width = np.linalg.norm(np.array(l_shldr) - np.array(r_shldr))
+                    # Redraw the overlay only when the landmarks (or frame size)
+                    # change; every other frame just gets it copied on
+                    h, w, _ = frame.shape
+                    if self._overlay is None or self._overlay.shape != frame.shape:
+                        self._overlay = np.zeros_like(frame)
+                        self._overlay_mask = np.zeros((h, w), dtype=bool)
+                        overlay_dirty = True
+                    
+                    if overlay_dirty:
+                        overlay_dirty = False
+                        canvas = self._overlay
+                        canvas[:] = 0
+                        self._overlay_roi = None
                         
-                        if shldr_width > 0:
-                            current_ratio = neck_height / shldr_width
+                        if pose_landmarks:
+                            lm = pose_landmarks
                             
-                            # Draw pose lines
-                            cv2.line(image_bgr, (int(shldr_mid_x), int(shldr_mid_y)),
-                                    (int(nose[0]), int(nose[1])), (255, 255, 0), 2)
-                            cv2.line(image_bgr, (int(l_shldr[0]), int(l_shldr[1])),
-                                    (int(r_shldr[0]), int(r_shldr[1])), (255, 0, 255), 2)
+                            # All landmarks scaled to pixels in one op; nose,
+                            # left shoulder and right shoulder drive the ratio
+                            px = np.array(
+                                [(p.x, p.y) for p in lm], dtype=np.float32
+                            ) * np.array((w, h), dtype=np.float32)
+                            pts = px[[0, 11, 12]]
+                            nose, l_shldr, r_shldr = pts
+                            (_, nose_y), (l_sx, l_sy), (r_sx, r_sy) = pts.tolist()
                             
-                            # Draw pose landmarks
-                            self.mp_drawing.draw_landmarks(
-                                image_bgr, results.pose_landmarks, self.mp_pose.POSE_CONNECTIONS
+                            # Ratio, own slouch status and score in one compiled call
+                            current_ratio, own_status, score_code, percentage = self._pm.classify(
+                                nose_y, l_sx, l_sy, r_sx, r_sy,
+                                self.baseline_ratio or 0.0, self.SENSITIVITY
                             )
                             
-                            # Show status - use monitor's status if available, otherwise calculate own
-                            status = None
-                            color = (255, 255, 255)
-                            
-                            # Prefer monitor's status if monitoring is running
-                            if self.monitor and self.monitor.running and hasattr(self.monitor, 'current_status'):
-                                monitor_status = self.monitor.current_status
-                                if "SLOUCHING" in monitor_status or "SLOUCH" in monitor_status:
-                                    status = "SLOUCHING"
-                                    color = (0, 0, 255)  # Red
-                                elif "Calibrating" in monitor_status:
-                                    status = "CALIBRATING..."
-                                    color = (0, 165, 255)  # Orange
-                                elif "Good" in monitor_status:
-                                    status = "GOOD POSTURE"
-                                    color = (0, 255, 0)  # Green
-                                elif "Error" in monitor_status:
-                                    status = "ERROR"
-                                    color = (0, 0, 255)  # Red
-                            
-                            # Fall back to own calculation if no monitor status
-                            if status is None and self.baseline_ratio:
-                                if current_ratio < (self.baseline_ratio * self.SENSITIVITY):
-                                    status = "SLOUCHING"
-                                    color = (0, 0, 255)  # Red
-                                else:
-                                    status = "GOOD POSTURE"
-                                    color = (0, 255, 0)  # Green
-                            
-                            # Draw status if we have one
-                            if status:
-                                font = cv2.FONT_HERSHEY_DUPLEX
-                                cv2.putText(image_bgr, status, (50, 50),
-                                           font, 0.7, color, 2)
+                            if own_status != self._pm.STATUS_INVALID:
+                                shldr_mid = (l_shldr + r_shldr) * 0.5
+                                
+                                # Draw pose lines
+                                draw_line(canvas, (int(shldr_mid[0]), int(shldr_mid[1])),
+                                        (int(nose[0]), int(nose[1])), (255, 255, 0), 2)
+                                draw_line(canvas, (int(l_shldr[0]), int(l_shldr[1])),
+                                        (int(r_shldr[0]), int(r_shldr[1])), (255, 0, 255), 2)
+                                
+                                # Draw pose landmarks (same look as mp_drawing,
+                                # which only accepts the legacy landmark type)
+                                joints = [tuple(p) for p in px.astype(np.int32).tolist()]
+                                visible = [p.visibility is None or p.visibility >= 0.5 for p in lm]
+                                for a, b in self.mp_pose.POSE_CONNECTIONS:
+                                    if visible[a] and visible[b]:
+                                        draw_line(canvas, joints[a], joints[b], (224, 224, 224), 2)
+                                for joint, is_visible in zip(joints, visible):
+                                    if is_visible:
+                                        draw_circle(canvas, joint, 2, (0, 0, 255), 2)
+                                
+                                # Show status - use monitor's status if available, otherwise calculate own
+                                status = None
+                                color = (255, 255, 255)
+                                
+                                # Prefer monitor's status if monitoring is running
+                                if self.monitor and self.monitor.running and hasattr(self.monitor, 'current_status'):
+                                    monitor_status = self.monitor.current_status
+                                    if "SLOUCHING" in monitor_status or "SLOUCH" in monitor_status:
+                                        status = "SLOUCHING"
+                                        color = (0, 0, 255)  # Red
+                                    elif "Calibrating" in monitor_status:
+                                        status = "CALIBRATING..."
+                                        color = (0, 165, 255)  # Orange
+                                    elif "Good" in monitor_status:
+                                        status = "GOOD POSTURE"
+                                        color = (0, 255, 0)  # Green
+                                    elif "Error" in monitor_status:
+                                        status = "ERROR"
+                                        color = (0, 0, 255)  # Red
                                 
-                                # Show posture ratio as percentage score
-                                if self.baseline_ratio and self.baseline_ratio > 0:
-                                    # Calculate percentage: (current / baseline) * 100
-                                    # 100% = baseline, >100% = better, <100% = worse
-                                    percentage = (current_ratio / self.baseline_ratio) * 100
-                                    percentage_text = f"Posture Score: {percentage:.0f}%"
-                                    
-                                    # Color code the percentage
-                                    if percentage >= 100:
-                                        score_color = (0, 255, 0)  # Green for good/excellent
-                                    elif percentage >= 85:
-                                        score_color = (0, 165, 255)  # Orange for fair
-                                    else:
-                                        score_color = (0, 0, 255)  # Red for poor
-                                    
-                                    cv2.putText(image_bgr, percentage_text, (50, 80),
-                                               font, 0.5, score_color, 2)
+                                # Fall back to own calculation if no monitor status
+                                if status is None and own_status in self._status_lut:
+                                    status, color = self._status_lut[own_status]
+                                
+                                # Draw status if we have one
+                                if status:
+                                    put_text(canvas, status, (50, 50),
+                                               font, 0.7, color, 2)
+                                
+                                    # Show posture ratio as percentage score
+                                    if self.baseline_ratio and self.baseline_ratio > 0:
+                                        percentage_text = f"Posture Score: {percentage:.0f}%"
+                                        put_text(canvas, percentage_text, (50, 80),
+                                                   font, 0.5, _SCORE_COLORS[score_code], 2)
+                            
+                        # Remember which pixels were drawn and the box around them
+                        mask = self._overlay_mask
+                        np.any(canvas, axis=2, out=mask)
+                        x, y, rw, rh = cv2.boundingRect(mask.view(np.uint8))
+                        if rw and rh:
+                            self._overlay_roi = (slice(y, y + rh), slice(x, x + rw))
                     
-                    # Emit frame for display
-                    self.frame_ready.emit(image_bgr)
+                    # Composite the overlay onto the live frame (drawn region only)
+                    roi = self._overlay_roi
+                    if roi is not None:
+                        np.copyto(frame[roi], self._overlay[roi],
+                                  where=self._overlay_mask[roi][..., None])
                     
-                    # Small delay to control frame rate
-                    self.msleep(33)  # ~30 fps
+                    # Publish frame for display (pacing comes from the camera itself)
+                    # Capture frames are contiguous and drawing keeps them so
+                    assert frame.flags.c_contiguous
+                    self._mutex.lock()
+                    self._latest = frame
+                    self._published = buf
+                    self._mutex.unlock()
+                    self.frame_ready.emit()
                     
                 except Exception as e:
                     print(f"Error processing frame: {e}")
-                    import traceback
                     traceback.print_exc()
                     self.msleep(100)
                     continue
             
         except Exception as e:
             print(f"Camera thread error: {e}")
-            import traceback
             traceback.print_exc()
-            self.frame_ready.emit(None)
+            self.camera_error.emit()
         finally:
+            if self._exec:
+                self._exec.shutdown(wait=False)
+                self._exec = None
             if self.cap:
                 try:
                     self.cap.release()
@@ -253,8 +450,28 @@ class CameraThread(QThread):
                 except:
                     pass
     
+    def get_latest(self):
+        """
+        Take the newest frame, or None if it was already taken. The frame's
+        buffer isn't reused until release_latest() is called.
+        """
+        self._mutex.lock()
+        frame = self._latest
+        if frame is not None:
+            self._latest = None
+            self._in_use = self._published
+            self._published = None
+        self._mutex.unlock()
+        return frame
+    
+    def release_latest(self):
+        """Hand the buffer from get_latest() back to the capture loop"""
+        self._mutex.lock()
+        self._in_use = None
+        self._mutex.unlock()
+    
     def stop(self):
-        """Stop the camera thread"""
+        """Stop the camera thread (the shared Pose model stays loaded)"""
         self.running = False
         if self.cap:
             self.cap.release()
@@ -262,6 +479,8 @@ class CameraThread(QThread):
 
 class PostureCorrectorWindow(QMainWindow):
     """Main window for Posture Corrector"""
+    # Emitted from the monitor thread's status callback; delivered on the GUI thread
+    monitor_permission_denied = Signal()
     
     def __init__(self):
         super().__init__()
@@ -275,14 +494,15 @@ class PostureCorrectorWindow(QMainWindow):
         )
         self.warning_popup = WarningPopup()
         self.camera_thread = None  # Camera preview thread
+        self._qimg = None  # Reused preview image, reallocated only if the frame size changes
         
         # Create UI
         self.init_ui()
+        self.monitor_permission_denied.connect(self.show_permission_denied)
         
-        # Status update timer
-        self.status_timer = QTimer()
-        self.status_timer.timeout.connect(self.update_display)
-        self.status_timer.start(100)  # Update every 100ms
+        # Preload MediaPipe once the window is up, overlapping the slow import
+        # with the user's first interaction
+        QTimer.singleShot(0, self.monitor.warmup)
     
     def init_ui(self):
         """Initialize the user interface"""
@@ -436,9 +656,9 @@ class PostureCorrectorWindow(QMainWindow):
     def start_monitoring(self):
         """Start posture monitoring"""
         if not self.monitor.running:
-            # Check camera permission first
+            # Remind about permission if the camera has already failed to open;
+            # the monitor's own open retriggers the macOS prompt if needed
             if not check_camera_permission():
-                # Try to request permission
                 msg = QMessageBox(self)
                 msg.setIcon(QMessageBox.Information)
                 msg.setWindowTitle("Camera Permission Required")
@@ -451,16 +671,6 @@ class PostureCorrectorWindow(QMainWindow):
                 )
                 msg.setStandardButtons(QMessageBox.Ok)
                 msg.exec()
-                
-                # Try to trigger permission dialog
-                if not request_camera_permission():
-                    QMessageBox.warning(
-                        self,
-                        "Camera Access Denied",
-                        "Camera permission is required. Please enable it in System Settings > Privacy & Security > Camera"
-                    )
-                    self.details_text.append("Camera permission denied. Please enable in System Settings.")
-                    return
             
             self.monitor.start()
             self.start_button.setEnabled(False)
@@ -491,62 +701,36 @@ class PostureCorrectorWindow(QMainWindow):
                 if self.camera_thread.isRunning():
                     try:
                         self.camera_thread.frame_ready.disconnect()
+                        self.camera_thread.camera_error.disconnect()
+                        self.camera_thread.permission_denied.disconnect()
                     except:
                         pass
                     self.camera_thread.stop()
                     self.camera_thread.wait(2000)
                 self.camera_thread = None
             
-            # Attempt to trigger permission dialog by opening camera briefly
-            # This will show the macOS permission prompt if not already granted
-            self.details_text.append("Requesting camera permission...")
-            cap = None
-            try:
-                cap = cv2.VideoCapture(0)
-                if cap.isOpened():
-                    # Try to read a frame to fully trigger permission dialog
-                    ret, _ = cap.read()
-                    if ret:
-                        self.details_text.append("Camera permission granted or already authorized.")
-                    else:
-                        self.details_text.append("Camera opened but frame read failed. Will retry in thread...")
-                # Always release immediately - don't hold the camera
-                if cap:
-                    cap.release()
-                    cap = None
-            except Exception as e:
-                if cap:
-                    try:
-                        cap.release()
-                    except:
-                        pass
-                    cap = None
-                self.details_text.append(f"Permission check: {str(e)}. Will attempt to start camera...")
-            
-            # Use QTimer to delay starting the thread, ensuring camera is fully released
-            # This prevents the camera from being opened twice simultaneously
-            delay_ms = 800
-            
-            def start_camera_thread():
-                baseline = None
-                if hasattr(self.monitor, 'baseline_ratio') and self.monitor.baseline_ratio > 0:
-                    baseline = self.monitor.baseline_ratio
-                
-                # Pass monitor reference so camera preview can use its status
-                self.camera_thread = CameraThread(baseline_ratio=baseline, monitor=self.monitor)
-                self.camera_thread.frame_ready.connect(self.update_camera_frame)
-                self.camera_thread.start()
-                self.camera_button.setText("Hide Camera Preview")
-                self.details_text.append("Camera preview thread started. Waiting for frames...")
+            # CameraThread is the only thing that opens the camera; the macOS
+            # permission prompt fires on that first open
+            baseline = None
+            if self.monitor.is_calibrated and self.monitor.baseline_ratio > 0:
+                baseline = self.monitor.baseline_ratio
             
-            # Wait before starting thread to ensure camera is fully released
-            QTimer.singleShot(delay_ms, start_camera_thread)
+            # Pass monitor reference so camera preview can use its status
+            self.camera_thread = CameraThread(baseline_ratio=baseline, monitor=self.monitor)
+            self.camera_thread.frame_ready.connect(self.update_camera_frame)
+            self.camera_thread.camera_error.connect(self.on_camera_error)
+            self.camera_thread.permission_denied.connect(self.on_permission_denied)
+            self.camera_thread.start()
+            self.camera_button.setText("Hide Camera Preview")
+            self.details_text.append("Camera preview thread started. Waiting for frames...")
         else:
             # Stop camera - disconnect signal first to prevent more frames
             if self.camera_thread:
                 # Disconnect the signal immediately to stop frame updates
                 try:
                     self.camera_thread.frame_ready.disconnect()
+                    self.camera_thread.camera_error.disconnect()
+                    self.camera_thread.permission_denied.disconnect()
                 except:
                     pass
                 
@@ -576,53 +760,70 @@ class PostureCorrectorWindow(QMainWindow):
                 self.camera_thread = None
                 self.details_text.append("Camera preview stopped.")
     
-    def update_camera_frame(self, frame):
-        """Update the camera display with a new frame"""
-        if frame is None:
-            self.camera_label.setText("Error: Could not open camera\n\nPlease check:\n1. Camera permissions in System Settings\n2. No other app is using the camera")
-            self.camera_label.setStyleSheet("""
-                QLabel {
-                    border: 2px solid #ff0000;
-                    border-radius: 5px;
-                    background-color: #ffebee;
-                    color: #c62828;
-                    padding: 20px;
-                }
-            """)
-            # Stop the thread
-            if self.camera_thread:
-                self.camera_thread.stop()
-                self.camera_thread.wait()
-                self.camera_thread = None
-                self.camera_button.setText("Show Camera Preview")
-            self.details_text.append("Camera error: Could not open camera")
+    def on_camera_error(self):
+        """Show the camera error and stop the preview thread"""
+        self.camera_label.setText("Error: Could not open camera\n\nPlease check:\n1. Camera permissions in System Settings\n2. No other app is using the camera")
+        self.camera_label.setStyleSheet("""
+            QLabel {
+                border: 2px solid #ff0000;
+                border-radius: 5px;
+                background-color: #ffebee;
+                color: #c62828;
+                padding: 20px;
+            }
+        """)
+        # Stop the thread
+        if self.camera_thread:
+            self.camera_thread.stop()
+            self.camera_thread.wait()
+            self.camera_thread = None
+            self.camera_button.setText("Show Camera Preview")
+        self.details_text.append("Camera error: Could not open camera")
+    
+    def on_permission_denied(self):
+        """Stop the preview and explain how to grant camera access"""
+        self.on_camera_error()
+        self.show_permission_denied()
+    
+    def show_permission_denied(self):
+        """Explain how to grant camera access"""
+        QMessageBox.warning(
+            self,
+            "Camera Access Denied",
+            "Camera permission is required. Please enable it in System Settings > Privacy & Security > Camera"
+        )
+        self.details_text.append("Camera permission denied. Please enable in System Settings.")
+    
+    def update_camera_frame(self):
+        """Update the camera display with the newest frame"""
+        camera_thread = self.camera_thread
+        if camera_thread is None:
             return
+        frame = camera_thread.get_latest()
+        if frame is None:
+            return  # Already displayed by an earlier signal
         
         try:
-            # Convert OpenCV BGR frame to QImage
-            h, w, ch = frame.shape
-            bytes_per_line = ch * w
-            
-            # Make sure frame data is contiguous
-            if not frame.flags['C_CONTIGUOUS']:
-                frame = np.ascontiguousarray(frame)
-            
-            qt_image = QImage(frame.data, w, h, bytes_per_line, QImage.Format_BGR888)
-            
-            # Convert to QPixmap and display
-            pixmap = QPixmap.fromImage(qt_image)
-            
-            # Scale to fit the label while maintaining aspect ratio
-            scaled_pixmap = pixmap.scaled(
-                self.camera_label.size(),
-                Qt.KeepAspectRatio,
-                Qt.SmoothTransformation
+            # Copy the OpenCV BGR frame into the persistent QImage
+            h, w = frame.shape[:2]
+            if self._qimg is None or self._qimg.width() != w or self._qimg.height() != h:
+                self._qimg = QImage(w, h, _QIMG_FMT)
+            # bits() is fetched every frame: it detaches the image if a previous
+            # pixmap still shares its data, so the pointer is always valid
+            pixels = np.ndarray(
+                (h, w, 3), dtype=np.uint8, buffer=self._qimg.bits(),
+                strides=(self._qimg.bytesPerLine(), 3, 1)
             )
+            try:
+                pixels[:] = frame
+            finally:
+                camera_thread.release_latest()
             
-            self.camera_label.setPixmap(scaled_pixmap)
+            # Convert to QPixmap and display; the label scales it to fit
+            # (setScaledContents) when painting, so no per-frame rescale here
+            self.camera_label.setPixmap(QPixmap.fromImage(self._qimg))
         except Exception as e:
             print(f"Error updating camera frame: {e}")
-            import traceback
             traceback.print_exc()
     
     def show_warning(self):
@@ -632,6 +833,13 @@ class PostureCorrectorWindow(QMainWindow):
     
     def on_status_update(self, status):
         """Handle status updates from monitor"""
+        # The monitor's camera opens count towards the cached permission state
+        if status == "Calibrating...":
+            _record_camera_open(True)
+        elif status == "Error: Camera access denied":
+            if _record_camera_open(False):
+                self.monitor_permission_denied.emit()
+        
         # Check if monitoring stopped unexpectedly
         if "Stopped" in status or "Error" in status:
             # Update button states if monitoring stopped
@@ -661,33 +869,32 @@ class PostureCorrectorWindow(QMainWindow):
             self.status_label.setText("Idle")
             self.status_label.setStyleSheet("padding: 10px; background-color: #f5f5f5; color: #424242; border-radius: 5px;")
     
-    def update_display(self):
-        """Update display with current status"""
-        if hasattr(self.monitor, 'current_status'):
-            # Status is updated via callback, this is just for periodic refresh
-            pass
-    
     def closeEvent(self, event):
         """Handle window close event"""
+        # Signal the camera preview first so it shuts down while the monitor stops
+        camera_thread = self.camera_thread
+        if camera_thread and camera_thread.isRunning():
+            camera_thread.stop()
+        
         # Stop monitoring
         self.monitor.stop()
         
-        # Stop camera preview
-        if self.camera_thread and self.camera_thread.isRunning():
-            self.camera_thread.stop()
-            self.camera_thread.wait()
-        
-        # Close any OpenCV windows
-        try:
-            cv2.destroyAllWindows()
-        except:
-            pass
+        # Wait for the camera preview, but don't let it hang the quit
+        if camera_thread and camera_thread.isRunning():
+            if not camera_thread.wait(1000):
+                camera_thread.terminate()
+                camera_thread.wait()
         
         event.accept()
 
 
 def main():
     """Main entry point"""
+    # OpenCV's thread count is process-wide, so it is set once here. The app
+    # only does small resizes/conversions in OpenCV; one thread keeps its pool
+    # from competing with MediaPipe's inference threads.
+    cv2.setNumThreads(1)
+    
     app = QApplication(sys.argv)
     app.setApplicationName("Posture Corrector")
     app.setApplicationDisplayName("Posture Corrector")
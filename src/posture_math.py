@@ -0,0 +1,85 @@
+"""
+Per-frame posture math for the monitor and camera preview.
+Compiled with Numba when it is installed, otherwise runs as plain Python.
+"""
+try:
+    from numba import njit
+except Exception:
+    # Not installed, or llvmlite failed to load its library (OSError in a bundle)
+    def njit(*args, **kwargs):
+        """Fallback when Numba isn't installed - leave the function as is"""
+        def decorator(func):
+            return func
+        return decorator
+
+
+# Status codes returned by classify()
+STATUS_INVALID = -1   # Shoulders overlap, no usable measurement
+STATUS_NONE = 0       # No baseline yet, nothing to compare against
+STATUS_GOOD = 1
+STATUS_SLOUCHING = 2
+
+# Score codes returned by classify()
+SCORE_GOOD = 0  # At or above baseline
+SCORE_FAIR = 1  # At least 85% of baseline
+SCORE_POOR = 2
+
+
+@njit(cache=True, fastmath=True)
+def posture_ratio(nose_y, l_sx, l_sy, r_sx, r_sy):
+    """
+    Neck height over shoulder width from pixel coordinates.
+
+    Returns:
+        The ratio, or -1.0 if the shoulders overlap (no usable measurement)
+    """
+    # Vertical distance (Neck Height)
+    neck_height = abs((l_sy + r_sy) * 0.5 - nose_y)
+
+    # Horizontal distance (Shoulder Width)
+    dx = l_sx - r_sx
+    dy = l_sy - r_sy
+    shldr_width = (dx * dx + dy * dy) ** 0.5
+
+    if shldr_width <= 0.0:
+        return -1.0
+    return neck_height / shldr_width
+
+
+@njit(cache=True, fastmath=True)
+def classify(nose_y, l_sx, l_sy, r_sx, r_sy, baseline, sensitivity):
+    """
+    Compute the posture ratio from pixel coordinates and classify it.
+
+    Args:
+        nose_y: Nose y coordinate
+        l_sx, l_sy: Left shoulder coordinates
+        r_sx, r_sy: Right shoulder coordinates
+        baseline: Calibrated baseline ratio (0 if not calibrated)
+        sensitivity: Fraction of baseline below which posture counts as slouching
+
+    Returns:
+        (ratio, status_code, score_code, percentage) where percentage is the
+        ratio as a percentage of baseline (0 without a baseline)
+    """
+    ratio = posture_ratio(nose_y, l_sx, l_sy, r_sx, r_sy)
+    if ratio < 0.0:
+        return 0.0, STATUS_INVALID, SCORE_POOR, 0.0
+
+    if baseline <= 0.0:
+        return ratio, STATUS_NONE, SCORE_POOR, 0.0
+
+    status = STATUS_GOOD
+    if ratio < baseline * sensitivity:
+        status = STATUS_SLOUCHING
+
+    # 100% = baseline, >100% = better, <100% = worse
+    percentage = ratio / baseline * 100.0
+    if percentage >= 100.0:
+        score = SCORE_GOOD
+    elif percentage >= 85.0:
+        score = SCORE_FAIR
+    else:
+        score = SCORE_POOR
+
+    return ratio, status, score, percentage
@@ -5,10 +5,117 @@ Runs headless (no GUI window) to avoid threading conflicts with GUI frameworks.
 """
 import cv2
 import numpy as np
+import os
+import sys
 import time
 import threading
 
 
+# Pose landmarker model for the MediaPipe Tasks API (enables GPU inference).
+# Download from https://storage.googleapis.com/mediapipe-models/pose_landmarker/pose_landmarker_lite/float16/latest/pose_landmarker_lite.task
+# MEDIAPIPE_MODEL_PATH overrides the location; the py2app bundle keeps it in
+# Contents/Resources.
+if os.environ.get('MEDIAPIPE_MODEL_PATH'):
+    POSE_MODEL_PATH = os.environ['MEDIAPIPE_MODEL_PATH']
+elif getattr(sys, 'frozen', False) and 'RESOURCEPATH' in os.environ:
+    POSE_MODEL_PATH = os.path.join(os.environ['RESOURCEPATH'], 'pose_landmarker_lite.task')
+else:
+    POSE_MODEL_PATH = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        'resources', 'pose_landmarker_lite.task'
+    )
+
+
+# Open cameras with the platform's native backend instead of letting OpenCV
+# probe each backend in turn
+if sys.platform == 'darwin':
+    CAMERA_BACKEND = cv2.CAP_AVFOUNDATION
+elif sys.platform.startswith('linux'):
+    CAMERA_BACKEND = cv2.CAP_V4L2
+else:
+    CAMERA_BACKEND = cv2.CAP_DSHOW
+
+
+# MediaPipe takes seconds to import, so it is loaded on first use and cached
+_mp = None
+_mp_lock = threading.Lock()
+
+
+def _import_mediapipe():
+    """Import MediaPipe once and return the cached module"""
+    global _mp
+    with _mp_lock:
+        if _mp is None:
+            import mediapipe as mp
+            _mp = mp
+    return _mp
+
+
+# posture_math pulls in Numba/llvmlite when installed, which is slow to import,
+# so it is also loaded on first use instead of on the app's startup path
+_posture_math = None
+_posture_math_lock = threading.Lock()
+
+
+def _import_posture_math():
+    """Import posture_math once and return the cached module"""
+    global _posture_math
+    with _posture_math_lock:
+        if _posture_math is None:
+            try:
+                from . import posture_math
+            except ImportError:
+                # Imported as a top-level module (python src/camera_preview.py)
+                import posture_math
+            _posture_math = posture_math
+    return _posture_math
+
+
+def _create_pose_landmarker(mp, min_detection_confidence=0.5):
+    """
+    Create a MediaPipe Tasks pose landmarker, preferring the GPU delegate.
+    
+    Args:
+        mp: The imported mediapipe module
+        min_detection_confidence: Minimum pose detection confidence
+    
+    Returns None if the model file is missing or the Tasks API can't be
+    initialized, in which case callers fall back to mp.solutions.pose.
+    """
+    if not os.path.exists(POSE_MODEL_PATH):
+        return None
+    
+    BaseOptions = mp.tasks.BaseOptions
+    vision = mp.tasks.vision
+    # GPU runs on Metal (macOS) / OpenGL-CUDA (Linux); CPU keeps it portable
+    for delegate in (BaseOptions.Delegate.GPU, BaseOptions.Delegate.CPU):
+        try:
+            options = vision.PoseLandmarkerOptions(
+                base_options=BaseOptions(model_asset_path=POSE_MODEL_PATH, delegate=delegate),
+                running_mode=vision.RunningMode.VIDEO,
+                min_pose_detection_confidence=min_detection_confidence,
+                min_tracking_confidence=0.5
+            )
+            landmarker = vision.PoseLandmarker.create_from_options(options)
+            print(f"Pose landmarker using {delegate.name} delegate")
+            return landmarker
+        except Exception as e:
+            print(f"Pose landmarker {delegate.name} delegate unavailable: {e}")
+    return None
+
+
+def _warmup_mediapipe():
+    """Preload MediaPipe (and compile the posture math) in the background"""
+    try:
+        _import_mediapipe()
+    except ImportError as e:
+        print(f"MediaPipe preload failed: {e}")
+    try:
+        _import_posture_math().posture_ratio(0.0, 0.0, 0.0, 1.0, 0.0)
+    except Exception as e:
+        print(f"Posture math compile failed: {e}")
+
+
 class PostureMonitor:
     """Monitors posture using MediaPipe - runs headless for menu bar compatibility"""
     
@@ -29,37 +136,138 @@ class PostureMonitor:
         self.mp_pose = None
         self.pose = None
         self.mp_drawing = None
+        self.landmarker = None  # Tasks API landmarker, used instead of pose when available
+        self._last_timestamp_ms = 0
+        # Guards self.pose and self.landmarker, which are shared with the
+        # camera preview thread
+        self.pose_lock = threading.Lock()
+        
+        # Capture - a small, slow stream is plenty for posture checks and
+        # shrinks every per-pixel step before and inside pose detection
+        self.CAPTURE_SIZE = (320, 240)
+        self.CAPTURE_FPS = 15  # Requested rate; drivers may deliver another
+        # Posture changes over seconds, so only every frame_stride-th frame is
+        # analyzed (~TARGET_ANALYSIS_FPS); frame counts below are in analyzed
+        # frames and are derived from the camera's actual rate once it opens
+        self.TARGET_ANALYSIS_FPS = 5
+        self.frame_stride = 3
+        self.ANALYSIS_FPS = self.CAPTURE_FPS / self.frame_stride
+        # Motion gate: pose detection is skipped (and the last landmarks
+        # reused) while the mean absolute difference of a MOTION_THUMB_SIZE
+        # thumbnail from the last detected frame stays below MOTION_THRESHOLD
+        self.MOTION_THUMB_SIZE = (32, 24)
+        self.MOTION_THRESHOLD = 3.0
         
         # Calibration
         self.calibration_frames = 0
-        self.avg_ratio = 0
         self.is_calibrated = False
-        self.calibration_limit = 90  # ~3 seconds at 30fps
-        self.baseline_ratio = 0
+        self.calibration_limit = 0  # ~3 seconds, see _set_frame_rate()
+        self.baseline_ratio = 0.0
+        self._calibration_sum = 0.0
+        # Baseline is the mean ratio over calibration. After that it drifts up
+        # (BASELINE_DRIFT_EMA) on frames at or above it so it can follow a
+        # better posture or a moved camera, capped at BASELINE_DRIFT_LIMIT above
+        # the calibrated value. It never drifts down, so a gradual slouch can't
+        # drag the threshold along with it.
+        self.calibrated_baseline = 0.0
+        self.BASELINE_DRIFT_EMA = 0.005
+        self.BASELINE_DRIFT_LIMIT = 0.10
         
         # Monitoring
         self.SENSITIVITY = 0.85
         self.slouch_timer = 0
         self.slouch_trigger_time = 3  # seconds of slouching before alert
+        # Derived thresholds: the frame counts are set from the camera's rate
+        # when it opens, the slouch threshold when calibration completes (and
+        # it follows baseline drift)
+        self.slouch_threshold = 0.0
+        self.slouch_status_frames = 0  # ~0.5 seconds
+        self.slouch_trigger_frames = 0
+        self._set_frame_rate(self.CAPTURE_FPS)
         
         self.cap = None
         self.current_status = "Idle"
+        
+        # Latest frame and landmarks, shared with the camera preview so it
+        # doesn't need its own camera and model (guarded by frame_lock)
+        self.frame_lock = threading.Lock()
+        self.latest_frame = None
+        self.latest_landmarks = None
+        
+        # Single-slot handoff from the capture thread to the analysis loop.
+        # Each frame gets an increasing id so a frame is never analyzed twice.
+        self._frame_ready = threading.Condition()
+        self._slot_frame = None
+        self._slot_id = 0
+        self._capture_thread = None
+        self._rgb_buf = None  # Reused RGB copy of the frame being analyzed
     
     def _initialize_mediapipe(self):
         """Initialize MediaPipe components (called on first start)"""
-        if self.mp_pose is None:
-            # Import MediaPipe only when needed (not at module level)
-            import mediapipe as mp
-            self.mp_pose = mp.solutions.pose
-            self.pose = self.mp_pose.Pose(
-                static_image_mode=False,
-                min_detection_confidence=0.5,
-                min_tracking_confidence=0.5
-            )
-            self.mp_drawing = mp.solutions.drawing_utils
+        with self.pose_lock:
+            if self.mp_pose is None:
+                # Import MediaPipe only when needed (not at module level)
+                mp = _import_mediapipe()
+                self.mp_pose = mp.solutions.pose
+                self.mp_drawing = mp.solutions.drawing_utils
+                
+                # Prefer the Tasks landmarker: a TFLite model run by the GPU
+                # delegate or XNNPACK on CPU, instead of the legacy graph
+                self.landmarker = _create_pose_landmarker(mp)
+                if self.landmarker is None:
+                    # Lite model - only the nose and shoulders are used, which it
+                    # tracks well enough at a fraction of the Full model's cost
+                    self.pose = self.mp_pose.Pose(
+                        static_image_mode=False,
+                        model_complexity=0,
+                        enable_segmentation=False,  # No segmentation mask needed
+                        smooth_landmarks=True,
+                        min_detection_confidence=0.5,
+                        min_tracking_confidence=0.5
+                    )
+    
+    def load_model(self):
+        """
+        Load the pose model if it isn't loaded yet. It is kept across
+        start/stop, so the camera preview can share it instead of loading its own.
+        """
+        self._initialize_mediapipe()
+    
+    def detect_landmarks(self, image_rgb):
+        """
+        Run pose detection on an RGB frame.
+        Safe to call from both the monitor loop and the camera preview thread.
+        
+        Returns:
+            The list of 33 normalized landmarks, or None if no pose was found
+        """
+        with self.pose_lock:
+            if self.landmarker is not None:
+                # VIDEO mode needs strictly increasing timestamps across all callers
+                timestamp_ms = max(int(time.monotonic() * 1000), self._last_timestamp_ms + 1)
+                self._last_timestamp_ms = timestamp_ms
+                mp_image = _mp.Image(image_format=_mp.ImageFormat.SRGB, data=image_rgb)
+                result = self.landmarker.detect_for_video(mp_image, timestamp_ms)
+                return result.pose_landmarks[0] if result.pose_landmarks else None
+            results = self.pose.process(image_rgb)
+        return results.pose_landmarks.landmark if results.pose_landmarks else None
+    
+    def warmup(self):
+        """Start importing MediaPipe in the background so the first start() is fast"""
+        threading.Thread(target=_warmup_mediapipe, daemon=True).start()
+    
+    def _set_frame_rate(self, fps):
+        """Derive the frame stride and frame-count thresholds from the capture rate"""
+        self.frame_stride = max(1, round(fps / self.TARGET_ANALYSIS_FPS))
+        self.ANALYSIS_FPS = fps / self.frame_stride
+        self.calibration_limit = max(1, round(3 * self.ANALYSIS_FPS))
+        self.slouch_status_frames = round(self.ANALYSIS_FPS / 2)
+        self.slouch_trigger_frames = round(self.ANALYSIS_FPS * self.slouch_trigger_time)
     
     def _update_status(self, status):
-        """Update current status and notify callback"""
+        """Update current status and notify callback (only when it changes)"""
+        if status == self.current_status:
+            return
         self.current_status = status
         if self.status_callback:
             self.status_callback(status)
@@ -78,6 +286,10 @@ class PostureMonitor:
         """Stop monitoring and release camera"""
         self.running = False
         
+        # Wake the analysis loop if it is waiting for a frame
+        with self._frame_ready:
+            self._frame_ready.notify_all()
+        
         # Wait a moment for loop to check the flag
         if self.thread and self.thread.is_alive():
             self.thread.join(timeout=0.5)
@@ -90,123 +302,218 @@ class PostureMonitor:
                 pass
             self.cap = None
         
-        # Ensure OpenCV windows are closed
-        try:
-            cv2.destroyAllWindows()
-        except:
-            pass
-        
         self._update_status("Stopped")
         
+    def _capture_loop(self, resize_to):
+        """Capture thread - keep the newest camera frame in the single-slot buffer"""
+        consecutive_failures = 0
+        max_consecutive_failures = 100  # ~1 second of failed reads
+        cap = self.cap  # stop() may clear self.cap while a read is in progress
+        
+        while self.running and cap.isOpened():
+            # read() blocks until the camera delivers the next frame, so the
+            # capture rate (CAPTURE_FPS) paces the loop
+            ret, frame = cap.read()
+            if not self.running:
+                break
+            while not ret and self.running:
+                consecutive_failures += 1
+                if consecutive_failures >= max_consecutive_failures:
+                    break
+                # Probe with grab() (no decode) and only decode once it succeeds
+                if cap.grab():
+                    ret, frame = cap.retrieve()
+                if not ret:
+                    time.sleep(0.01)
+            if not ret:
+                if self.running:
+                    # Camera failed multiple times - update status and exit gracefully
+                    self.running = False
+                    self._update_status("Error: Camera read failed")
+                    print(f"Camera read failed {consecutive_failures} times - stopping monitoring")
+                break
+            # Reset failure counter on successful read
+            consecutive_failures = 0
+
+            if resize_to is not None:
+                frame = cv2.resize(frame, resize_to, interpolation=cv2.INTER_AREA)
+            
+            # Every frame goes to the camera preview; the analysis loop picks
+            # up whichever frame is newest when it is ready
+            with self.frame_lock:
+                self.latest_frame = frame
+            with self._frame_ready:
+                self._slot_frame = frame
+                self._slot_id += 1
+                self._frame_ready.notify()
+        
+        # Wake the analysis loop so it notices capture has ended
+        with self._frame_ready:
+            self._frame_ready.notify_all()
+        
     def _monitor_loop(self):
         """Main monitoring loop - runs headless (no GUI window)"""
-        # Try to open camera with retry (gives time for permission dialog)
+        # Try to open camera with retry (gives time for permission dialog).
+        # A capture that fails is always released before the next attempt,
+        # since a leaked one can keep the camera busy.
         self.cap = None
         for attempt in range(3):
-            self.cap = cv2.VideoCapture(0)
-            if self.cap.isOpened():
+            cap = cv2.VideoCapture(0, CAMERA_BACKEND)
+            if cap.isOpened():
+                # Compressed frames instead of raw YUV, where the backend
+                # supports choosing the format
+                cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+                cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.CAPTURE_SIZE[0])
+                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.CAPTURE_SIZE[1])
+                cap.set(cv2.CAP_PROP_FPS, self.CAPTURE_FPS)
                 # Test if we can actually read a frame
-                ret, _ = self.cap.read()
+                ret, test_frame = cap.read()
                 if ret:
+                    self.cap = cap
                     break
-            else:
-                self.cap.release()
-                self.cap = None
-            time.sleep(0.5)  # Wait before retry
-        
-        if not self.cap or not self.cap.isOpened():
-            self._update_status("Error: Camera access denied")
+            cap.release()
+            if not self.running:
+                return
+            if attempt < 2:
+                time.sleep(0.25 * (2 ** attempt))  # Back off: 0.25, 0.5 s
+        else:
+            # Clear running first so the status callback sees monitoring has ended
             self.running = False
+            self._update_status("Error: Camera access denied")
+            self._update_status("Stopped")
             return
         
+        # Time-based thresholds count frames, so base them on the rate the
+        # driver actually delivers (0 when the backend can't report it)
+        reported_fps = self.cap.get(cv2.CAP_PROP_FPS)
+        if 1 <= reported_fps <= 120:
+            fps = reported_fps
+            source = "reported by camera"
+        else:
+            fps = self.CAPTURE_FPS
+            source = f"requested rate, camera reported {reported_fps:.0f}"
+        self._set_frame_rate(fps)
+        print(f"Camera at {fps:.0f} fps ({source}) - analyzing every {self.frame_stride} frame(s)")
+        
+        # Downscale only if the driver ignored the requested size (keeping
+        # its aspect ratio); the frame size is fixed from here on
+        h, w = test_frame.shape[:2]
+        resize_to = None
+        if w > self.CAPTURE_SIZE[0]:
+            resize_to = (self.CAPTURE_SIZE[0], round(h * self.CAPTURE_SIZE[0] / w))
+            w, h = resize_to
+        self._rgb_buf = np.empty((h, w, 3), np.uint8)
+        
         self._update_status("Calibrating...")
         print("Calibrating... Please sit up straight for 3 seconds")
         
+        posture_ratio = _import_posture_math().posture_ratio
+        
         # Reset calibration
         self.calibration_frames = 0
-        self.avg_ratio = 0
+        self._calibration_sum = 0.0
         self.is_calibrated = False
+        last_progress = -1
         
-        consecutive_failures = 0
-        max_consecutive_failures = 30  # ~1 second at 30fps
+        # Capture runs on its own thread so camera I/O overlaps pose detection
+        with self._frame_ready:
+            self._slot_frame = None
+            self._slot_id = 0
+        self._capture_thread = threading.Thread(
+            target=self._capture_loop, args=(resize_to,), daemon=True
+        )
+        self._capture_thread.start()
         
-        while self.running and self.cap.isOpened():
-            ret, frame = self.cap.read()
-            if not ret:
-                consecutive_failures += 1
-                if consecutive_failures >= max_consecutive_failures:
-                    # Camera failed multiple times - update status and exit gracefully
-                    self._update_status("Error: Camera read failed")
-                    print(f"Camera read failed {consecutive_failures} times - stopping monitoring")
-                    break
-                # Wait a bit before retrying
-                time.sleep(0.033)
-                continue
-            else:
-                # Reset failure counter on successful read
-                consecutive_failures = 0
-
-            image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.pose.process(image)
+        last_id = 0
+        prev_thumb = None
+        lm = None
+        while self.running:
+            # Wait for the newest frame, at least frame_stride frames past the
+            # last analyzed one (frames in between are dropped)
+            with self._frame_ready:
+                self._frame_ready.wait_for(
+                    lambda: not self.running or self._slot_id >= last_id + self.frame_stride,
+                    timeout=0.5
+                )
+                if self._slot_id < last_id + self.frame_stride:
+                    continue  # Stopping, or the camera stalled
+                last_id, frame = self._slot_id, self._slot_frame
 
-            h, w, _ = frame.shape
-
-            if results.pose_landmarks:
-                lm = results.pose_landmarks.landmark
-
-                nose = [lm[0].x * w, lm[0].y * h]
-                l_shldr = [lm[11].x * w, lm[11].y * h]
-                r_shldr = [lm[12].x * w, lm[12].y * h]
+            # Skip detection while the user is still; the posture checks
+            # below run on the last landmarks as usual
+            thumb = cv2.resize(frame, self.MOTION_THUMB_SIZE, interpolation=cv2.INTER_AREA)
+            if prev_thumb is None or cv2.absdiff(thumb, prev_thumb).mean() >= self.MOTION_THRESHOLD:
+                prev_thumb = thumb
+                
+                # BGR -> RGB into the reused buffer (detection is synchronous, so
+                # it is free again by the next frame)
+                if self._rgb_buf.shape != frame.shape:
+                    self._rgb_buf = np.empty_like(frame)
+                image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
+                lm = self.detect_landmarks(image)
+                
+                with self.frame_lock:
+                    self.latest_landmarks = lm
 
-                shldr_mid_y = (l_shldr[1] + r_shldr[1]) / 2
+            if lm:
 
-                # Vertical distance (Neck Height)
-                neck_height = abs(shldr_mid_y - nose[1])
-                
-                # Horizontal distance (Shoulder Width)
-                shldr_width = np.linalg.norm(np.array(l_shldr) - np.array(r_shldr))
+                # Read each landmark attribute once into a scalar (nose x is unused)
+                nose, l_shldr, r_shldr = lm[0], lm[11], lm[12]
+                current_ratio = posture_ratio(
+                    nose.y * h, l_shldr.x * w, l_shldr.y * h, r_shldr.x * w, r_shldr.y * h
+                )
 
-                if shldr_width > 0:  # Avoid division by zero
-                    current_ratio = neck_height / shldr_width
+                if current_ratio >= 0:  # Negative when the shoulders overlap
 
                     if not self.is_calibrated:
                         # Calibration phase
+                        self._calibration_sum += current_ratio
                         self.calibration_frames += 1
-                        self.avg_ratio += current_ratio
                         
-                        progress = int((self.calibration_frames / self.calibration_limit) * 100)
-                        self._update_status(f"Calibrating: {progress}%")
+                        progress = (self.calibration_frames * 100) // self.calibration_limit
+                        if progress > last_progress:
+                            last_progress = progress
+                            self._update_status(f"Calibrating: {progress}%")
                         
                         if self.calibration_frames >= self.calibration_limit:
-                            self.baseline_ratio = self.avg_ratio / self.calibration_limit
+                            self.baseline_ratio = self._calibration_sum / self.calibration_frames
+                            self.calibrated_baseline = self.baseline_ratio
                             self.is_calibrated = True
+                            self.slouch_threshold = self.baseline_ratio * self.SENSITIVITY
                             self._update_status("Monitoring")
                             print(f"Calibration complete! Baseline Ratio: {self.baseline_ratio:.2f}")
 
                     else:
                         # Monitoring phase - check for slouch
-                        if current_ratio < (self.baseline_ratio * self.SENSITIVITY):
+                        if current_ratio < self.slouch_threshold:
                             self.slouch_timer += 1
                             # Update status to show slouching
-                            if self.slouch_timer > 15:  # ~0.5 seconds
+                            if self.slouch_timer > self.slouch_status_frames:
                                 self._update_status("SLOUCHING!")
                         else:
                             self.slouch_timer = 0
                             self._update_status("Good posture")
+                            # Let the baseline drift up only, within a band above calibration
+                            if current_ratio >= self.baseline_ratio:
+                                self.baseline_ratio += self.BASELINE_DRIFT_EMA * (current_ratio - self.baseline_ratio)
+                                self.baseline_ratio = min(self.baseline_ratio,
+                                                          self.calibrated_baseline * (1.0 + self.BASELINE_DRIFT_LIMIT))
+                                self.slouch_threshold = self.baseline_ratio * self.SENSITIVITY
                         
                         # Trigger Warning after sustained slouching
-                        if self.slouch_timer > (30 * self.slouch_trigger_time):
+                        if self.slouch_timer > self.slouch_trigger_frames:
                             if self.warning_callback:
                                 self.warning_callback()
                             self.slouch_timer = 0  # Reset to prevent spam
-            
-            # Sleep to prevent CPU hogging (no cv2.waitKey since we're headless)
-            time.sleep(0.033)  # ~30 fps
-            
-            # Check if we should stop more frequently
-            if not self.running:
-                break
+        
+        if self._capture_thread:
+            self._capture_thread.join(timeout=1.0)
+            self._capture_thread = None
                 
+        with self.frame_lock:
+            self.latest_frame = None
+            self.latest_landmarks = None
+        
         # Cleanup: release camera
         if self.cap:
             try:
@@ -3,16 +3,21 @@ Warning popup UI component.
 Creates prominent warnings using native macOS dialogs and notifications.
 """
 import time
-import threading
 import subprocess
 
 
+def _osa_escape(text):
+    """Escape text for use inside an AppleScript string literal"""
+    return text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
 class WarningPopup:
     """Creates a prominent full-screen warning popup using native macOS"""
     
     def __init__(self):
         """Initialize the warning popup"""
-        self.is_showing = False
+        self.DEBOUNCE_SECONDS = 1.0  # Ignore repeat alerts within this window
+        self._last_shown = -self.DEBOUNCE_SECONDS
         
     def show_warning(self, message="⚠️ POSTURE ALERT ⚠️", submessage="Sit tall! Your posture is slipping."):
         """
@@ -22,14 +27,20 @@ class WarningPopup:
             message: Main warning message
             submessage: Additional details message
         """
-        if self.is_showing:
+        now = time.monotonic()
+        if now - self._last_shown < self.DEBOUNCE_SECONDS:
             return
             
-        self.is_showing = True
+        self._last_shown = now
+        
+        message = _osa_escape(message)
+        submessage = _osa_escape(submessage)
         
-        # Create a very prominent alert using osascript
-        # This creates a modal dialog that appears on top of everything
+        # One osascript process for both effects: the notification (with
+        # sound) fires immediately, then a modal dialog appears on top of
+        # everything
         alert_script = f'''
+        display notification "{submessage}" with title "{message}" sound name "Basso"
         tell application "System Events"
             activate
             display dialog "{message}\\n\\n{submessage}" with title "⚠️ POSTURE ALERT ⚠️" buttons {{"OK"}} default button "OK" with icon caution giving up after 3
@@ -40,20 +51,3 @@ class WarningPopup:
         subprocess.Popen(['osascript', '-e', alert_script], 
                         stdout=subprocess.DEVNULL, 
                         stderr=subprocess.DEVNULL)
-        
-        # Also send a notification
-        notification_script = f'''
-        display notification "{submessage}" with title "{message}" sound name "Basso"
-        '''
-        subprocess.Popen(['osascript', '-e', notification_script],
-                        stdout=subprocess.DEVNULL,
-                        stderr=subprocess.DEVNULL)
-        
-        # Reset flag after a delay
-        def reset_flag():
-            time.sleep(1)
-            self.is_showing = False
-        
-        threading.Thread(target=reset_flag, daemon=True).start()
-
-